@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
 import argparse
+import functools
 import logging
 import sys
-import tomllib
 from pathlib import Path
 from typing import Any
 
@@ -11,6 +11,9 @@ from . import keyplay
 
 def setup_logging(log_level: str, log_file: str | None) -> None:
     """Configure logging based on command line arguments."""
+    # Only needed for the MemoryHandler below; not worth importing on the --keycaps path
+    from logging.handlers import MemoryHandler
+
     # Convert string level to logging constant
     numeric_level = getattr(logging, log_level.upper(), None)
     if not isinstance(numeric_level, int):
@@ -28,11 +31,14 @@ def setup_logging(log_level: str, log_file: str | None) -> None:
     # Clear existing handlers
     root_logger.handlers.clear()
 
-    # Console handler
+    # Console handler, buffered so bulk runs don't write() once per record (warnings and
+    # errors still go out right away and logging flushes whatever is left at exit)
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(numeric_level)
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    root_logger.addHandler(
+        MemoryHandler(256, flushLevel=logging.WARNING, target=console_handler)
+    )
 
     # File handler if specified
     if log_file:
@@ -47,13 +53,30 @@ def load_config_file(config_path: Path | None) -> dict[str, Any]:
     if not config_path:
         return {}
 
-    if not config_path.exists():
-        raise FileNotFoundError(f"Configuration file not found: {config_path}")
+    # Only needed with --config, just like tomllib in _parse_config_file()
+    import copy
 
-    with open(config_path, "rb") as f:
-        config = tomllib.load(f)
+    try:
+        mtime_ns = config_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Configuration file not found: {config_path}") from None
+
+    # Deep copied so callers can't modify the cached (parsed) config, not even nested values
+    # like the names list (which ends up as args.names)
+    return copy.deepcopy(_parse_config_file(config_path, mtime_ns))
 
-    return config
+
+@functools.lru_cache(maxsize=8)
+def _parse_config_file(config_path: Path, mtime_ns: int) -> dict[str, Any]:
+    """
+    Parses the TOML file at `config_path`.  The modification time is part of the cache key
+    so an edited file gets parsed again.
+    """
+    # Imported here so runs without --config don't pay for tomllib (and re)
+    import tomllib
+
+    with open(config_path, "rb") as f:
+        return tomllib.load(f)
 
 
 def merge_config_with_args(
@@ -61,18 +84,11 @@ def merge_config_with_args(
 ) -> argparse.Namespace:
     """Merge TOML configuration with command line arguments."""
     # Create a copy of args to modify
-    merged_args = argparse.Namespace()
-
-    # Copy all existing attributes from args
-    for attr_name in dir(args):
-        if not attr_name.startswith("_"):
-            setattr(merged_args, attr_name, getattr(args, attr_name))
+    merged_args = argparse.Namespace(**vars(args))
 
     # Override with config values (excluding the config parameter itself)
-    config_copy = {k: v for k, v in config.items() if k != "config"}
-
-    for key, value in config_copy.items():
-        if hasattr(merged_args, key):
+    for key, value in config.items():
+        if key != "config" and hasattr(merged_args, key):
             setattr(merged_args, key, value)
 
     return merged_args
@@ -157,6 +173,12 @@ def make_args_parser() -> argparse.ArgumentParser:
 
 
 def main() -> None:
+    # Listing the keycaps needs neither the argument parser nor logging.  Anything more than a
+    # bare -k goes through the parser so --config, --help and usage errors behave as usual.
+    if sys.argv[1:] in (["-k"], ["--keycaps"]):
+        keyplay.print_keycaps()
+        return
+
     args_parser = make_args_parser()
     args = args_parser.parse_args()
 
@@ -172,6 +194,11 @@ def main() -> None:
             print(f"Error loading configuration: {e}", file=sys.stderr)
             sys.exit(1)
 
+    # Listing the keycaps isn't a log event so there's no need to set up logging for it
+    if args.keycaps:
+        keyplay.print_keycaps()
+        return
+
     # Set up logging before any other operations
     try:
         setup_logging(args.log_level, args.log_file)
@@ -179,10 +206,7 @@ def main() -> None:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
 
-    if args.keycaps:
-        keyplay.print_keycaps()
-    else:
-        keyplay.run(args)
+    keyplay.run(args)
 
 
 if __name__ == "__main__":
@@ -271,6 +271,8 @@ class Keycap:
                 out += properly_escaped_quote + ","
             elif legend == '"':
                 out += r'"\""'
+            elif legend == "\\":
+                out += r'"\\\\",'
             else:
                 out += json.dumps(legend) + ","
         out = out.rstrip(",")  # Get rid of trailing comma
@@ -314,10 +316,56 @@ class Keycap:
                 last_part = ""
                 # render = ["keycap", "stem", "legends"]
                 render.append("legends")
+        return f"{first_part}{self._defines(render, self.quote(self.legends))}' {last_part}"
+
+    def argv(self, name=None, render=None, file_type=None, output_file=None):
+        """
+        Returns the OpenSCAD command line to use to generate this keycap as a
+        list of arguments so it can be run without going through a shell.
+
+        `name`, `render` and `file_type` can be given to override the keycap's
+        own values for this command only (e.g. to render just its legends)
+        without having to modify or copy the keycap.  Callers that already
+        built the path of the file to generate can pass it as `output_file`
+        (it takes precedence over `name` and `file_type`).
+
+        .. note::
+
+            Since no shell is involved the legends don't need any of the
+            escaping done by `quote()`.
+        """
+        render = self.render if render is None else render
+        if output_file is None:
+            name = self.name if name is None else name
+            file_type = self.file_type if file_type is None else file_type
+            output_file = f"{self.output_path}/{name}.{file_type}"
+        openscad_args = self.openscad_args.split()
+        legends = json.dumps(self.legends, ensure_ascii=False, separators=(",", ":"))
+        if self.colorscad_path and os.path.exists(self.colorscad_path):  # Use colorscad.sh
+            return [
+                str(self.colorscad_path),
+                "-i", str(self.keycap_playground_path),
+                "-o", output_file,
+                "-p", str(self.openscad_path),
+                "--", *openscad_args,
+                "-D", self._defines([*render, "legends"], legends),
+            ]
+        return [
+            str(self.openscad_path),
+            *openscad_args,
+            "-o", output_file,
+            "-D", self._defines(render, legends),
+            str(self.keycap_playground_path),
+        ]
+
+    def _defines(self, render, legends):
+        """
+        Returns the OpenSCAD variable assignments (the value passed to `-D`)
+        for this keycap.  `legends` must already be encoded.
+        """
         # NOTE: Since OpenSCAD requires double quotes I'm using the json module
         #       to encode things that need it:
         return (
-            f"{first_part}"
             f"RENDER={json.dumps(render)}; "
             f"KEY_PROFILE={json.dumps(self.key_profile)}; "
             f"KEY_LENGTH={round(self.key_length, 2)}; "
@@ -366,7 +414,7 @@ class Keycap:
             f"HOMING_DOT_X={self.homing_dot_x}; "
             f"HOMING_DOT_Y={self.homing_dot_y}; "
             f"HOMING_DOT_Z={self.homing_dot_z}; "
-            f"LEGENDS={self.quote(self.legends)}; "
+            f"LEGENDS={legends}; "
             f"LEGEND_FONTS={json.dumps(self.fonts)}; "
             f"LEGEND_FONT_SIZES={self.font_sizes}; "
             f"LEGEND_TRANS={self.trans}; "
@@ -377,8 +425,7 @@ class Keycap:
             f"LEGEND_UNDERSET={self.underset}; "
 
             # NOTE: For some reason I have to duplicate RENDER here for it to work properly:
-            f"RENDER={json.dumps(render)};' "
-            f"{last_part}"
+            f"RENDER={json.dumps(render)};"
         )
 
     def postinit(self, **kwargs):
@@ -18,202 +18,196 @@ Fonts used by this script:
  * Noto
 """
 
-import asyncio
-import functools
 import logging
 import os
-import subprocess
 from argparse import Namespace
-from collections.abc import Sequence
-from copy import deepcopy
 from pathlib import Path
-from typing import Any
 
 from src.keycap import Keycap
-from src.riskeycap import KEYCAPS
 
 logger = logging.getLogger(__name__)
+# NOTE: Debug messages use lazy %-formatting so the (fairly long) commands they log (each
+#       keycap's str(), i.e. its shell command line, and the argv lists) only get formatted
+#       when debug logging is actually enabled.
 
 
-def run_command(cmd: str) -> str:
+def run_command(cmd: list[str]) -> str | None:
     """
-    Run prepared behave command in shell and return its output.
-    :param cmd: Well-formed behave command to run.
-    :return: Command output as string.
+    Run prepared OpenSCAD command (no shell involved) and report whether it failed.
+    :param cmd: Well-formed OpenSCAD command as a list of arguments.
+    :return: The command's error output if it failed, None if it succeeded.
     """
-    logger.debug(f"Running {cmd}")
+    import subprocess  # Deferred along with ThreadPoolExecutor; see run()
+
+    logger.debug("Running %s", cmd)
     try:
-        output = subprocess.check_output(
+        # Nothing uses the output of a successful render so only keep stderr around for errors
+        result = subprocess.run(
             cmd,
-            stderr=subprocess.STDOUT,
-            universal_newlines=True,
-            shell=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
             cwd=os.getcwd(),
+            check=False,
         )
-    except subprocess.CalledProcessError as e:
-        logger.exception(f"Error running {cmd}\n{e}")
-        output = e.output
-
-    return output
-
-
-async def run_command_on_loop(
-    loop: asyncio.AbstractEventLoop, command: str, semaphore: asyncio.Semaphore
-) -> str:
-    """
-    Run test for one particular feature, check its result and return report.
-    :param loop: Loop to use.
-    :param command: Command to run.
-    :return: Result of the command.
-    """
-    logger.debug("Starting commands loop")
-    async with semaphore:
-        runner = functools.partial(run_command, command)
-        output = await loop.run_in_executor(None, runner)
-        await asyncio.sleep(1)  # Slowing a bit for demonstration purposes
-        return output
+    except OSError as e:
+        logger.error(f"Error running {cmd}\n{e}")
+        return str(e)
 
+    if result.returncode:
+        logger.error(f"Error running {cmd} (exit code {result.returncode})\n{result.stderr}")
+        return result.stderr
 
-async def process_result(result: Any) -> None:
-    """
-    Do something useful with result of the commands
-    """
-    await asyncio.sleep(0)  # Make it a proper coroutine
-    logger.debug(f"Processing command result: {result}")
-
-
-async def run_all_commands(semaphore: asyncio.Semaphore, commands: Sequence[str]) -> None:
-    """
-    Run all commands in a list
-    :param commands: List of commands to run.
-    """
-    logger.debug("Running all commands")
-    loop = asyncio.get_event_loop()
-    fs = [run_command_on_loop(loop, command, semaphore) for command in commands]
-    results = []
-    for f in asyncio.as_completed(fs):
-        result = await f
-        results.append(asyncio.ensure_future(process_result(result)))
-
-    logger.info("All commands completed")
-    logger.debug(f"{results=}")
+    return None
 
 
 def print_keycaps() -> None:
     """
     Prints the names of all keycaps in KEYCAPS.
     """
+    from src.riskeycap import KEYCAPS
+
     keycap_names = ", ".join(a.name for a in KEYCAPS)
-    logger.info(f"Here's all the keycaps we can render:\n{keycap_names}")
+    print(f"Here's all the keycaps we can render:\n{keycap_names}")
 
 
-def should_skip_file(output_path: Path | str, name: str, file_type: str, force: bool) -> bool:
+def list_existing_files(output_path: Path | str) -> set[str]:
+    """Returns the names of the files already in `output_path` (none if it doesn't exist)."""
+    try:
+        with os.scandir(output_path) as entries:
+            return {entry.name for entry in entries}
+    except FileNotFoundError:
+        return set()
+
+
+def should_skip_file(
+    existing: set[str], output_path: Path | str, file_name: str, force: bool
+) -> bool:
     """Check if a file should be skipped based on existence and force flag."""
-    file_path = f"{output_path}/{name}.{file_type}"
-    if not force and os.path.exists(file_path):
-        logger.info(f"{file_path} exists; skipping...")
+    if not force and file_name in existing:
+        logger.info(f"{output_path}/{file_name} exists; skipping...")
         return True
     return False
 
 
 def make_keycap_command(
-    keycap: Keycap, output_path: Path, file_type: str, force: bool
-) -> str | None:
+    keycap: Keycap, output_path: Path, file_type: str, force: bool, existing: set[str]
+) -> list[str] | None:
     """Make a command for a keycap to the commands list."""
     keycap.output_path = output_path
     keycap.file_type = file_type
+    file_name = f"{keycap.name or ''}.{file_type}"
 
-    if should_skip_file(output_path, keycap.name or "", file_type, force):
+    if should_skip_file(existing, output_path, file_name, force):
         return
 
-    logger.info(f"Rendering {output_path}/{keycap.name}.{file_type}...")
-    logger.debug(f"Keycap details: {keycap}")
-    return str(keycap)
+    # Built once so the logged path is exactly the one the command writes to
+    output_file = f"{output_path}/{file_name}"
+    logger.info(f"Rendering {output_file}...")
+    logger.debug("Keycap details: %s", keycap)
+    return keycap.argv(output_file=output_file)
 
 
-def make_legend_command(keycap: Keycap, output_path: Path, force: bool) -> str | None:
+def make_legend_command(
+    keycap: Keycap, output_path: Path, force: bool, existing: set[str]
+) -> list[str] | None:
     """Add a command for keycap legends to the commands list."""
     if keycap.legends == [""]:
         return
 
-    legend_name = f"{keycap.name}_legends"
-    legend_file_type = "stl"  # Always use STL for legends
+    file_name = f"{keycap.name}_legends.stl"  # Always use STL for legends
 
-    if should_skip_file(output_path, legend_name, legend_file_type, force):
+    if should_skip_file(existing, output_path, file_name, force):
         return
 
-    legend = deepcopy(keycap)
-
-    legend.name = legend_name
-    legend.output_path = output_path
-    legend.render = ["legends"]
-    legend.file_type = legend_file_type
+    keycap.output_path = output_path
 
-    logger.info(f"Rendering {output_path}/{legend.name}.{legend_file_type}...")
-    logger.debug(f"Legend details: {legend}")
-    return str(legend)
+    output_file = f"{output_path}/{file_name}"
+    command = keycap.argv(render=["legends"], output_file=output_file)
+    logger.info(f"Rendering {output_file}...")
+    logger.debug("Legend details: %s", command)
+    return command
 
 
-def process_specific_keycaps(args: Namespace) -> list[str]:
+def process_specific_keycaps(args: Namespace, existing: set[str]) -> list[list[str]]:
     """Process commands for specific keycap names."""
+    from src.riskeycap import KEYCAPS_BY_NAME
+
     commands = []
 
     for name in args.names:
-        name_found = False
-        for keycap in KEYCAPS:
-            if keycap.name and keycap.name.lower() == name.lower():
-                name_found = True
-                new_command = make_keycap_command(keycap, args.out, args.file_type, args.force)
-                if new_command:
-                    commands.append(new_command)
-
-                if args.legends:
-                    new_command = make_legend_command(keycap, args.out, args.force)
-                    if new_command:
-                        commands.append(new_command)
-                break
-
-        if not name_found:
+        keycap = KEYCAPS_BY_NAME.get(name.lower())
+        if keycap is None:
             logger.warning(f"Could not find a keycap named {name}")
+            continue
+
+        new_command = make_keycap_command(
+            keycap, args.out, args.file_type, args.force, existing
+        )
+        if new_command:
+            commands.append(new_command)
+
+        if args.legends:
+            new_command = make_legend_command(keycap, args.out, args.force, existing)
+            if new_command:
+                commands.append(new_command)
 
     return commands
 
 
-def process_all_keycaps(args: Namespace) -> list[str]:
+def process_all_keycaps(args: Namespace, existing: set[str]) -> list[list[str]]:
     """Process commands for all keycaps."""
+    from src.riskeycap import KEYCAPS
+
     commands = []
     for keycap in KEYCAPS:
-        new_command = make_keycap_command(keycap, args.out, args.file_type, args.force)
+        new_command = make_keycap_command(
+            keycap, args.out, args.file_type, args.force, existing
+        )
         if new_command:
             commands.append(new_command)
 
         if args.legends:
-            new_command = make_legend_command(keycap, args.out, args.force)
+            new_command = make_legend_command(keycap, args.out, args.force, existing)
             if new_command:
                 commands.append(new_command)
 
     return commands
 
 
-def make_commands(args: Namespace) -> list[str]:
-    """Returns a list of commands to generate the keycaps using OpenSCAD"""
+def make_commands(args: Namespace, existing: set[str] | None = None) -> list[list[str]]:
+    """
+    Returns a list of commands to generate the keycaps using OpenSCAD.
+    :param existing: Names of the files already in the output directory (listed if not given).
+    """
+    if existing is None:
+        # One directory listing up front instead of a stat() per output file
+        existing = set() if args.force else list_existing_files(args.out)
     if args.names:
-        commands = process_specific_keycaps(args)
+        commands = process_specific_keycaps(args, existing)
     else:
-        commands = process_all_keycaps(args)
+        commands = process_all_keycaps(args, existing)
 
     return commands
 
 
 def run(args: Namespace) -> None:
-    output_path = Path(args.out)
-    logger.info(f"Outputting to: {args.out}")
+    # Only rendering needs these so listing the keycaps doesn't pay for importing them
+    from concurrent.futures import ThreadPoolExecutor
 
-    if not output_path.exists():
-        logger.error(f"Output directory '{args.out}' does not exist")
-        return
+    logger.info(f"Outputting to: {args.out}")
+    os.makedirs(args.out, exist_ok=True)
 
     commands = make_commands(args)
-    semaphore = asyncio.Semaphore(args.max_processes)
-    loop = asyncio.get_event_loop()
-    loop.run_until_complete(run_all_commands(semaphore=semaphore, commands=commands))
+    # Let any buffered log records out before the (slow) rendering starts
+    for handler in logging.getLogger().handlers:
+        handler.flush()
+
+    # OpenSCAD does the heavy lifting in its own process so threads are all we need here
+    with ThreadPoolExecutor(max_workers=args.max_processes) as executor:
+        errors = [error for error in executor.map(run_command, commands) if error is not None]
+
+    if errors:
+        logger.warning(f"{len(errors)} of {len(commands)} commands failed")
+    else:
+        logger.info("All commands completed")
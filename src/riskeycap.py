@@ -630,7 +630,7 @@ class riskeycap_7U(riskeycap_alphas):
             self.name = f"7U_{self.name}"
 
 
-KEYCAPS = [
+KEYCAPS = (
     # Basic 1U keys
     RiskeycapBase(name="1U_blank"),
     riskeycap_tilde(name="tilde", legends=["`", "", "~"]),
@@ -807,7 +807,7 @@ KEYCAPS = [
     riskeycap_brackets(name="lbracket", legends=["[", "", "{"]),
     riskeycap_brackets(name="rbracket", legends=["]", "", "}"]),
     riskeycap_semicolon(name="semicolon", legends=[";", "", ":"]),
-    riskeycap_double_legends(name="quote", legends=["'", "", "\\u0022"]),
+    riskeycap_double_legends(name="quote", legends=["'", "", '"']),
     riskeycap_gt_lt(name="comma", legends=[",", "", "<"]),
     riskeycap_gt_lt(name="dot", legends=[".", "", ">"]),
     riskeycap_double_legends(name="slash", legends=["/", "", "?"]),
@@ -851,8 +851,8 @@ KEYCAPS = [
     ),
     # 1.5U keys
     riskeycap_1_5U(name="blank"),
-    riskeycap_bslash_1U(name="bslash", legends=["\\u005c", "", "|"]),
-    riskeycap_bslash(name="bslash", legends=["\\u005c", "", "|"]),
+    riskeycap_bslash_1U(name="bslash", legends=["\\", "", "|"]),
+    riskeycap_bslash(name="bslash", legends=["\\", "", "|"]),
     riskeycap_tab(name="Tab", legends=["Tab"]),
     riskeycap_1_5U(name="Ctrl", legends=["Ctrl"], font_sizes=[4]),
     riskeycap_1_5U(name="LAlt", legends=["Alt"], font_sizes=[4]),
@@ -952,4 +952,7 @@ KEYCAPS = [
         scale=[[1.4, 1, 3]],
         trans=[[2.9, 0, 0]],
     ),
-]
+)
+
+# Keycaps by (lowercase) name; reversed so the first keycap wins when several share a name
+KEYCAPS_BY_NAME = {keycap.name.lower(): keycap for keycap in reversed(KEYCAPS) if keycap.name}
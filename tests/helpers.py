@@ -0,0 +1,16 @@
+"""
+Assertion helpers shared by the test modules.
+"""
+
+
+class CommandAssertions:
+    """Mixin for `unittest.TestCase` classes that check generated OpenSCAD commands."""
+
+    def assertAllIn(self, members, container, msg=None):
+        """
+        Like calling `assertIn` for each of `members` but reports every missing member at
+        once instead of stopping at the first one.
+        """
+        missing = [member for member in members if member not in container]
+        if missing:
+            self.fail(self._formatMessage(msg, f"{missing!r} not found in {container!r}"))
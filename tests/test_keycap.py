@@ -1,9 +1,31 @@
+import functools
 import unittest
 
 from src.keycap import Keycap
-
-
-class TestKeycap(unittest.TestCase):
+from tests.helpers import CommandAssertions
+
+# (render option, how it should show up in the command) shared by the render tests below
+RENDER_CASES = [
+    (["keycap"], '["keycap"]'),
+    (["stem"], '["stem"]'),
+    (["legends"], '["legends"]'),
+    (["keycap", "stem"], '["keycap", "stem"]'),
+    (["keycap", "legends"], '["keycap", "legends"]'),
+    (["stem", "legends"], '["stem", "legends"]'),
+    (["keycap", "stem", "legends"], '["keycap", "stem", "legends"]'),
+]
+
+
+@functools.lru_cache
+def render_test_command(render_option):
+    """
+    Returns the command for the "render_test" keycap rendering `render_option` (a tuple so
+    it can be cached).  The render tests in both classes below check the same cases.
+    """
+    return str(Keycap(name="render_test", render=list(render_option)))
+
+
+class TestKeycap(CommandAssertions, unittest.TestCase):
     """Unit tests for the Keycap class"""
 
     def test_keycap_initialization_defaults(self):
@@ -59,9 +81,58 @@ class TestKeycap(unittest.TestCase):
         )
 
         command = str(keycap)
-        self.assertIn('RENDER=["keycap", "stem"]', command)
-        self.assertIn('KEY_PROFILE="riskeycap"', command)
-        self.assertIn('LEGENDS=["A"]', command)
+        self.assertAllIn(
+            [
+                'RENDER=["keycap", "stem"]',
+                'KEY_PROFILE="riskeycap"',
+                'LEGENDS=["A"]',
+            ],
+            command,
+        )
+
+    def test_argv_generation(self):
+        """Test that the OpenSCAD command is generated as a list of arguments"""
+        keycap = Keycap(
+            name="test",
+            output_path="/tmp/out",
+            file_type="stl",
+            legends=["A"],
+            render=["keycap", "stem"],
+        )
+
+        argv = keycap.argv()
+        self.assertEqual(argv[0], str(keycap.openscad_path))
+        self.assertEqual(argv[argv.index("-o") + 1], "/tmp/out/test.stl")
+        self.assertEqual(argv[-1], str(keycap.keycap_playground_path))
+
+        defines = argv[argv.index("-D") + 1]
+        self.assertTrue(defines.startswith('RENDER=["keycap", "stem"]; '))
+        self.assertTrue(defines.endswith('RENDER=["keycap", "stem"];'))
+        self.assertIn('KEY_PROFILE="riskeycap"', defines)
+        self.assertIn('LEGENDS=["A"]', defines)
+
+    def test_argv_overrides_leave_keycap_untouched(self):
+        """Test that argv overrides only apply to the generated command"""
+        keycap = Keycap(name="test", output_path="/tmp/out", file_type="3mf")
+
+        argv = keycap.argv(name="test_legends", render=["legends"], file_type="stl")
+        self.assertEqual(argv[argv.index("-o") + 1], "/tmp/out/test_legends.stl")
+        self.assertIn('RENDER=["legends"]', argv[argv.index("-D") + 1])
+
+        argv = keycap.argv(output_file="/elsewhere/test.stl")
+        self.assertEqual(argv[argv.index("-o") + 1], "/elsewhere/test.stl")
+
+        self.assertEqual(keycap.name, "test")
+        self.assertEqual(keycap.render, ["keycap", "stem"])
+        self.assertEqual(keycap.file_type, "3mf")
+
+    def test_argv_legends_need_no_shell_escaping(self):
+        """Test that quote characters in legends are passed to OpenSCAD as-is"""
+        keycap = Keycap(name="quotes", legends=["'", '"', "↵"])
+
+        argv = keycap.argv()
+        defines = argv[argv.index("-D") + 1]
+        self.assertIn("""LEGENDS=["'","\\"","↵"]""", defines)
 
     def test_quote_escaping_functionality(self):
         """Test that single quotes are properly escaped in legend lists"""
@@ -71,6 +142,10 @@ class TestKeycap(unittest.TestCase):
         result = keycap.quote(["'", "test"])
         self.assertIn('"\'"\'"\'"', result)  # Properly escaped single quote
 
+        # Test backslash escaping (bash's $'...' collapses every pair)
+        result = keycap.quote(["\\"])
+        self.assertEqual(result, r'["\\\\"]')
+
         # Test normal strings
         result = keycap.quote(["A", "B"])
         self.assertIn('"A","B"', result)
@@ -88,12 +163,17 @@ class TestKeycap(unittest.TestCase):
         )
 
         command = str(keycap)
-        self.assertIn('KEY_PROFILE="dsa"', command)
-        self.assertIn("KEY_HEIGHT=9.0", command)
-        self.assertIn("KEY_LENGTH=18.25", command)
-        self.assertIn("DISH_DEPTH=1.0", command)
-        self.assertIn("WALL_THICKNESS=1.5", command)
-        self.assertIn('LEGENDS=["TEST"]', command)
+        self.assertAllIn(
+            [
+                'KEY_PROFILE="dsa"',
+                "KEY_HEIGHT=9.0",
+                "KEY_LENGTH=18.25",
+                "DISH_DEPTH=1.0",
+                "WALL_THICKNESS=1.5",
+                'LEGENDS=["TEST"]',
+            ],
+            command,
+        )
 
 
 class TestKeycapEdgeCases(unittest.TestCase):
@@ -156,30 +236,19 @@ class TestKeycapEdgeCases(unittest.TestCase):
     def test_file_type_variations(self):
         """Test different file type outputs"""
         for file_type in ["stl", "3mf", "amf"]:
-            keycap = Keycap(name="test", file_type=file_type)
-            command = str(keycap)
-            self.assertIn(f"test.{file_type}'", command)
+            with self.subTest(file_type=file_type):
+                command = str(Keycap(name="test", file_type=file_type))
+                self.assertIn(f"test.{file_type}'", command)
 
     def test_render_options(self):
         """Test different render options"""
-        test_cases = [
-            (["keycap"], '["keycap"]'),
-            (["stem"], '["stem"]'),
-            (["legends"], '["legends"]'),
-            (["keycap", "stem"], '["keycap", "stem"]'),
-            (["keycap", "legends"], '["keycap", "legends"]'),
-            (["stem", "legends"], '["stem", "legends"]'),
-            (["keycap", "stem", "legends"], '["keycap", "stem", "legends"]'),
-        ]
-
-        for render_option, expected_json in test_cases:
+        for render_option, expected_json in RENDER_CASES:
             with self.subTest(render_option=render_option):
-                keycap = Keycap(name="render_test", render=render_option)
-                command = str(keycap)
+                command = render_test_command(tuple(render_option))
                 self.assertIn(f"RENDER={expected_json}", command)
 
 
-class TestKeycapProperties(unittest.TestCase):
+class TestKeycapProperties(CommandAssertions, unittest.TestCase):
     """Test keycap properties and invariants"""
 
     def test_keycap_name_persistence(self):
@@ -212,11 +281,8 @@ class TestKeycapProperties(unittest.TestCase):
         command = str(keycap)
 
         # Basic elements should be present
-        self.assertIn("-o", command)
-        self.assertIn("cmd_test", command)
-        self.assertIn("KEY_PROFILE", command)
+        self.assertAllIn(["-o", "cmd_test", "KEY_PROFILE", "LEGENDS"], command)
         self.assertIn("DSA", command.upper())
-        self.assertIn("LEGENDS", command)
 
     def test_default_render_includes_keycap(self):
         """Test that default render includes keycap"""
@@ -225,17 +291,9 @@ class TestKeycapProperties(unittest.TestCase):
 
     def test_render_parameter_preservation(self):
         """Test that render parameter is preserved in output"""
-        test_cases = [
-            (["keycap"], '["keycap"]'),
-            (["stem"], '["stem"]'),
-            (["legends"], '["legends"]'),
-            (["keycap", "stem"], '["keycap", "stem"]'),
-        ]
-
-        for render_option, expected_json in test_cases:
+        for render_option, expected_json in RENDER_CASES[:4]:
             with self.subTest(render_option=render_option):
-                keycap = Keycap(name="render_test", render=render_option)
-                command = str(keycap)
+                command = render_test_command(tuple(render_option))
                 self.assertIn(f"RENDER={expected_json}", command)
 
 
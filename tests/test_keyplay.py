@@ -3,40 +3,57 @@
 Tests for the main script to validate OpenSCAD command generation with mocks
 """
 
+import io
 import pathlib
 import subprocess
+import tempfile
 import unittest
+from argparse import Namespace
+from contextlib import redirect_stdout
 from unittest.mock import patch
 
 from src.keycap import OPENSCAD_PATH
-from src.keyplay import run_command
-from src.riskeycap import KEYCAPS, RiskeycapBase, riskeycap_alphas
+from src.keyplay import print_keycaps, run, run_command
+from src.riskeycap import KEYCAPS, KEYCAPS_BY_NAME, RiskeycapBase, riskeycap_alphas
+from tests.helpers import CommandAssertions
 
+FIRST_KEYCAPS = KEYCAPS[:3]
 
-class TestRiskeycapBase(unittest.TestCase):
+
+class TestRiskeycapBase(CommandAssertions, unittest.TestCase):
     """Test cases for keyplay.py OpenSCAD command generation"""
 
-    def setUp(self):
-        """Set up test fixtures"""
-        self.output_path = pathlib.Path("/tmp/test_output")
+    output_path = pathlib.Path("/tmp/test_output")
 
     def test_basic_keycap_command_generation(self):
         """Test that the RiskeycapBase class generates the correct OpenSCAD command"""
-        keycap = RiskeycapBase(
-            name="test_keycap",
-            output_path=self.output_path,
-            legends=["A"]
-        )
-
-        command = str(keycap)
-
-        # Check that the command contains expected elements
-        # The actual path to the OpenSCAD executable is used instead of just "openscad"
-        self.assertIn(str(OPENSCAD_PATH), command)  # Check for OpenSCAD in the path
-        self.assertIn("test_keycap.stl", command)
-        self.assertIn('RENDER=["keycap", "stem"]', command)
-        self.assertIn('KEY_PROFILE="riskeycap"', command)
-        self.assertIn('LEGENDS=["A"]', command)
+        for name, legend in [
+            ("test_keycap", "A"),
+            ("mock_test_keycap", "X"),
+            ("script_test_keycap", "Z"),
+        ]:
+            with self.subTest(name=name):
+                keycap = RiskeycapBase(
+                    name=name, output_path=self.output_path, legends=[legend]
+                )
+
+                command = str(keycap)
+
+                # Check that the command contains expected elements
+                # The actual path to the OpenSCAD executable is used instead of just "openscad"
+                self.assertAllIn(
+                    [
+                        str(OPENSCAD_PATH),  # Check for OpenSCAD in the path
+                        f"{name}.stl",
+                        'RENDER=["keycap", "stem"]',
+                        'KEY_PROFILE="riskeycap"',
+                        f'LEGENDS=["{legend}"]',
+                        "KEY_ROTATION=[0, 110.1, -90]",
+                        "WALL_THICKNESS=1.0125",  # 0.45 * 2.25
+                        "UNIFORM_WALL_THICKNESS=true",
+                    ],
+                    command,
+                )
 
     def test_riskeycap_alphas_command_generation(self):
         """Test OpenSCAD command generation with riskeycap_alphas subclass"""
@@ -53,22 +70,6 @@ class TestRiskeycapBase(unittest.TestCase):
         self.assertIn("KEY_ROTATION=[0, 110.1, -90]", command)
         self.assertIn('LEGENDS=["B"]', command)
 
-    def test_keycap_execution_with_mock(self):
-        """Test that keycap execution calls the correct OpenSCAD command"""
-        keycap = RiskeycapBase(
-            name="mock_test_keycap",
-            output_path=self.output_path,
-            legends=["X"]
-        )
-
-        command = str(keycap)
-
-        # Verify the command contains expected elements
-        self.assertIn(str(OPENSCAD_PATH), command)  # Check for OpenSCAD in the path
-        self.assertIn("mock_test_keycap.stl", command)
-        self.assertIn('KEY_PROFILE="riskeycap"', command)
-        self.assertIn('LEGENDS=["X"]', command)
-
     def test_multiple_legends_command_generation(self):
         """Test OpenSCAD command generation with multiple legends"""
         keycap = RiskeycapBase(
@@ -92,11 +93,7 @@ class TestRiskeycapBase(unittest.TestCase):
         self.assertGreater(len(KEYCAPS), 0)  # Should have some keycaps
 
         # Find a specific keycap in the list
-        alphas_keycap = None
-        for keycap in KEYCAPS:
-            if keycap.name == "1U_blank":
-                alphas_keycap = keycap
-                break
+        alphas_keycap = KEYCAPS_BY_NAME.get("1u_blank")
 
         self.assertIsNotNone(alphas_keycap)
         self.assertEqual(alphas_keycap.name, "1U_blank")
@@ -104,86 +101,126 @@ class TestRiskeycapBase(unittest.TestCase):
     def test_command_generation_for_keycaps_list(self):
         """Test command generation for first few keycaps in the list"""
         # Test first few keycaps to make sure they generate valid commands
-        for i, keycap in enumerate(KEYCAPS[:3]):  # Test first 3
-            command = str(keycap)
-            self.assertIn(str(OPENSCAD_PATH), command)  # Check for OpenSCAD in the path
-            self.assertIn(f"{keycap.name}.{keycap.file_type}", command)
-            self.assertIn('RENDER=["keycap", "stem"]', command)
-
-            # Stop if we've tested 3 successfully
-            if i >= 2:
-                break
-
-    def test_keyplay_script_execution_with_mock(self):
-        """Test that keyplay script execution uses the correct OpenSCAD command"""
-        # Create a keycap from the keyplay script
-        keycap = RiskeycapBase(
-            name="script_test_keycap",
-            output_path=self.output_path,
-            legends=["Z"]
-        )
-
-        # Generate the OpenSCAD command
-        command = str(keycap)
-
-        # Ensure the command contains the expected elements
-        self.assertIn(str(OPENSCAD_PATH), command)
-        self.assertIn("script_test_keycap.stl", command)
-        self.assertIn('KEY_PROFILE="riskeycap"', command)
-        self.assertIn('LEGENDS=["Z"]', command)
-        self.assertIn("KEY_ROTATION=[0, 110.1, -90]", command)
-        self.assertIn("WALL_THICKNESS=1.0125", command)  # 0.45 * 2.25
-        self.assertIn("UNIFORM_WALL_THICKNESS=true", command)
+        for keycap in FIRST_KEYCAPS:
+            with self.subTest(keycap=keycap.name):
+                command = str(keycap)
+                self.assertAllIn(
+                    [
+                        str(OPENSCAD_PATH),  # Check for OpenSCAD in the path
+                        f"{keycap.name}.{keycap.file_type}",
+                        'RENDER=["keycap", "stem"]',
+                    ],
+                    command,
+                )
+
+    def test_catalog_legends_reach_openscad_unescaped(self):
+        """Test that the catalog's backslash and double quote legends survive the argv"""
+        keycaps = [keycap for keycap in KEYCAPS if keycap.name.endswith("bslash")]
+        self.assertEqual(len(keycaps), 2)
+        for keycap in keycaps:
+            with self.subTest(keycap=keycap.name):
+                argv = keycap.argv()
+                self.assertIn(r'LEGENDS=["\\","","|"]', argv[argv.index("-D") + 1])
+
+        argv = KEYCAPS_BY_NAME["quote"].argv()
+        self.assertIn(r"""LEGENDS=["'","","\""]""", argv[argv.index("-D") + 1])
 
 
 class TestKeyplayRunFunction(unittest.TestCase):
     """Test the run_command function from keyplay module"""
 
+    @classmethod
+    def setUpClass(cls):
+        """Patch subprocess.run once for the whole class"""
+        patcher = patch("subprocess.run")
+        cls.mock_run = patcher.start()
+        cls.addClassCleanup(patcher.stop)
+
+    def setUp(self):
+        """Give every test a clean subprocess.run mock"""
+        self.mock_run.reset_mock(return_value=True, side_effect=True)
+
     def test_run_command_success(self):
         """Test that run_command executes successfully with mock subprocess"""
-        test_cmd = "echo 'hello world'"
+        test_cmd = ["echo", "hello world"]
+        self.mock_run.return_value = subprocess.CompletedProcess(test_cmd, 0, stderr="")
+
+        result = run_command(test_cmd)
+
+        # Verify that subprocess.run was called with correct parameters
+        self.mock_run.assert_called_once_with(
+            test_cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            cwd=unittest.mock.ANY,  # We don't care about the exact cwd
+            check=False,
+        )
 
-        with patch("subprocess.check_output") as mock_check_output:
-            mock_check_output.return_value = "hello world\n"
+        # Nothing is returned for a successful command
+        self.assertIsNone(result)
 
-            result = run_command(test_cmd)
+    def test_run_command_error_handling(self):
+        """Test that run_command returns the error output of a failed command"""
+        test_cmd = ["nonexistent_command"]
+        self.mock_run.return_value = subprocess.CompletedProcess(
+            test_cmd, 1, stderr="Command failed\n"
+        )
 
-            # Verify that subprocess.check_output was called with correct parameters
-            mock_check_output.assert_called_once_with(
-                test_cmd,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                shell=True,
-                cwd=unittest.mock.ANY  # We don't care about the exact cwd
-            )
+        with self.assertLogs("src.keyplay", level="ERROR"):
+            result = run_command(test_cmd)
 
-            # Verify the result is what we expected
-            self.assertEqual(result, "hello world\n")
+        self.mock_run.assert_called_once()
 
-    def test_run_command_error_handling(self):
-        """Test that run_command handles CalledProcessError properly"""
-        # Simulate a CalledProcessError
-        test_cmd = "nonexistent_command"
+        # Verify the result is the command's error output
+        self.assertEqual(result, "Command failed\n")
 
-        with patch("subprocess.check_output") as mock_check_output:
-            # Create a mock exception with an output
-            mock_exception = subprocess.CalledProcessError(1, test_cmd)
-            mock_exception.output = "Command failed\n"
-            mock_check_output.side_effect = mock_exception
+    def test_run_command_missing_executable(self):
+        """Test that run_command reports (instead of raising) a missing executable"""
+        test_cmd = ["/nonexistent/openscad"]
+        self.mock_run.side_effect = FileNotFoundError(2, "No such file", test_cmd[0])
 
+        with self.assertLogs("src.keyplay", level="ERROR"):
             result = run_command(test_cmd)
 
-            # Verify that subprocess.check_output was called with correct parameters
-            mock_check_output.assert_called_once_with(
-                test_cmd,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                shell=True,
-                cwd=unittest.mock.ANY  # We don't care about the exact cwd
-            )
-
-            # Verify the result is the error output from the exception
-            self.assertEqual(result, "Command failed\n")
+        self.assertIn("/nonexistent/openscad", result)
+
+    def test_print_keycaps_lists_all_names(self):
+        """Test that print_keycaps prints every keycap name without going through logging"""
+        with redirect_stdout(io.StringIO()) as stdout, self.assertNoLogs("src.keyplay"):
+            print_keycaps()
+
+        self.assertIn(", ".join(keycap.name for keycap in KEYCAPS), stdout.getvalue())
+
+    def test_run_executes_every_command(self):
+        """Test that run hands every generated command to run_command"""
+        commands = [["first", "command"], ["second", "command"], ["third", "command"]]
+
+        with (
+            tempfile.TemporaryDirectory() as out,
+            patch("src.keyplay.make_commands", return_value=commands),
+            patch("src.keyplay.run_command", return_value=None) as mock_run_command,
+        ):
+            run(Namespace(out=out, max_processes=2))
+
+        self.assertEqual(
+            sorted(call.args[0] for call in mock_run_command.call_args_list), sorted(commands)
+        )
+
+    def test_run_creates_missing_output_directory(self):
+        """Test that run creates the output directory if it doesn't exist yet"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            out = pathlib.Path(tmp_dir, "keycaps", "numbers")
+
+            with (
+                patch("src.keyplay.make_commands", return_value=[]) as mock_make_commands,
+                patch("src.keyplay.run_command") as mock_run_command,
+            ):
+                run(Namespace(out=str(out), max_processes=2))
+
+            self.assertTrue(out.is_dir())
+            mock_make_commands.assert_called_once()
+            mock_run_command.assert_not_called()
 
 
 if __name__ == "__main__":
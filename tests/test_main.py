@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Tests for the command line entry point in __main__.py
+"""
+
+import argparse
+import io
+import logging
+import os
+import tempfile
+import tomllib
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from unittest.mock import patch
+
+from src.__main__ import load_config_file, main, merge_config_with_args, setup_logging
+
+
+class TestSetupLogging(unittest.TestCase):
+    """Test the setup_logging function"""
+
+    def setUp(self):
+        """Send the console output to a buffer and restore the root logger afterwards"""
+        root_logger = logging.getLogger()
+        self.addCleanup(setattr, root_logger, "handlers", root_logger.handlers[:])
+        self.addCleanup(root_logger.setLevel, root_logger.level)
+
+        stdout_patcher = patch("sys.stdout", new_callable=io.StringIO)
+        self.stdout = stdout_patcher.start()
+        self.addCleanup(stdout_patcher.stop)
+
+        setup_logging("INFO", None)
+        self.logger = logging.getLogger("tests.setup_logging")
+
+    def test_info_is_buffered_until_flushed(self):
+        """Test that INFO records only show up on the console once the handlers are flushed"""
+        self.logger.info("Rendering A.stl...")
+        self.assertEqual(self.stdout.getvalue(), "")
+
+        for handler in logging.getLogger().handlers:
+            handler.flush()
+        self.assertIn("Rendering A.stl...", self.stdout.getvalue())
+
+    def test_warning_flushes_right_away(self):
+        """Test that a WARNING shows up immediately, along with what was buffered before it"""
+        self.logger.info("Rendering A.stl...")
+        self.logger.warning("1 of 1 commands failed")
+
+        output = self.stdout.getvalue()
+        self.assertIn("Rendering A.stl...", output)
+        self.assertIn("1 of 1 commands failed", output)
+
+
+class TestLoadConfigFile(unittest.TestCase):
+    """Test the load_config_file function"""
+
+    def setUp(self):
+        """Write a config file to a temporary directory"""
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.config_path = Path(tmp_dir.name, "keyplay.toml")
+        self.config_path.write_text('out = "keycaps"\nlegends = true\nnames = ["A"]\n')
+
+    def test_no_config_path(self):
+        """Test that no config path means an empty config"""
+        self.assertEqual(load_config_file(None), {})
+
+    def test_missing_config_file(self):
+        """Test that a missing config file raises FileNotFoundError"""
+        with self.assertRaises(FileNotFoundError):
+            load_config_file(self.config_path.with_name("missing.toml"))
+
+    def test_config_file_is_parsed(self):
+        """Test that the TOML file contents are returned"""
+        self.assertEqual(
+            load_config_file(self.config_path),
+            {"out": "keycaps", "legends": True, "names": ["A"]},
+        )
+
+    def test_unchanged_config_file_is_parsed_once(self):
+        """Test that loading the same unchanged file again doesn't re-parse it"""
+        with patch("tomllib.load", wraps=tomllib.load) as mock_load:
+            first = load_config_file(self.config_path)
+            first["out"] = "modified by the caller"
+            first["names"].append("B")
+            second = load_config_file(self.config_path)
+
+        mock_load.assert_called_once()
+        self.assertEqual(second["out"], "keycaps")
+        self.assertEqual(second["names"], ["A"])
+
+    def test_modified_config_file_is_parsed_again(self):
+        """Test that a config file is re-parsed once it has been modified"""
+        load_config_file(self.config_path)
+
+        self.config_path.write_text('out = "elsewhere"\n')
+        stat = self.config_path.stat()
+        os.utime(self.config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        self.assertEqual(load_config_file(self.config_path), {"out": "elsewhere"})
+
+
+class TestMergeConfigWithArgs(unittest.TestCase):
+    """Test the merge_config_with_args function"""
+
+    def test_config_values_override_args(self):
+        """Test that known config values replace the command line ones"""
+        args = argparse.Namespace(out=".", force=False, config="keyplay.toml")
+
+        merged = merge_config_with_args({"out": "keycaps", "force": True}, args)
+
+        self.assertEqual(merged.out, "keycaps")
+        self.assertTrue(merged.force)
+        self.assertEqual(merged.config, "keyplay.toml")
+
+    def test_unknown_and_config_keys_are_ignored(self):
+        """Test that config keys without a matching argument (and config itself) are skipped"""
+        args = argparse.Namespace(out=".", config="keyplay.toml")
+
+        merged = merge_config_with_args({"config": "other.toml", "unknown": 1}, args)
+
+        self.assertEqual(vars(merged), {"out": ".", "config": "keyplay.toml"})
+
+    def test_original_args_are_not_modified(self):
+        """Test that merging returns a new namespace instead of updating args"""
+        args = argparse.Namespace(out=".")
+
+        merged = merge_config_with_args({"out": "keycaps"}, args)
+
+        self.assertIsNot(merged, args)
+        self.assertEqual(args.out, ".")
+
+
+class TestMain(unittest.TestCase):
+    """Test the main function"""
+
+    def test_list_keycaps(self):
+        """Test that -k lists the keycaps without rendering anything"""
+        with (
+            patch("sys.argv", ["keyplay", "-k"]),
+            patch("src.keyplay.run") as mock_run,
+            redirect_stdout(io.StringIO()) as stdout,
+        ):
+            main()
+
+        mock_run.assert_not_called()
+        self.assertIn("Here's all the keycaps we can render", stdout.getvalue())
+
+    def test_list_keycaps_with_missing_config_file(self):
+        """Test that -k still reports a missing config file (and fails)"""
+        with (
+            patch("sys.argv", ["keyplay", "-k", "-c", "/nonexistent/keyplay.toml"]),
+            redirect_stdout(io.StringIO()) as stdout,
+            redirect_stderr(io.StringIO()) as stderr,
+            self.assertRaises(SystemExit) as cm,
+        ):
+            main()
+
+        self.assertEqual(cm.exception.code, 1)
+        self.assertIn("Error: Configuration file not found", stderr.getvalue())
+        self.assertEqual(stdout.getvalue(), "")
+
+    def test_config_option_without_value(self):
+        """Test that -c without a path is reported with the full usage"""
+        with (
+            patch("sys.argv", ["keyplay", "-c"]),
+            redirect_stderr(io.StringIO()) as stderr,
+            self.assertRaises(SystemExit) as cm,
+        ):
+            main()
+
+        self.assertEqual(cm.exception.code, 2)
+        self.assertIn("[-j MAX_PROCESSES]", stderr.getvalue())
+        self.assertIn("argument -c/--config: expected one argument", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,29 +2,58 @@
 Tests for the make_commands function in keyplay.py
 """
 
+import os
+import tempfile
 import unittest
 from pathlib import Path
+from typing import ClassVar
 from unittest.mock import patch
 
+from src import riskeycap
 from src.keyplay import make_commands
 from src.riskeycap import KEYCAPS, RiskeycapBase
+from tests.helpers import CommandAssertions
+
+FIRST_KEYCAP_NAME = KEYCAPS[0].name if KEYCAPS else None
 
 
 class MockArgs:
+    # Defaults for whatever isn't passed in
+    out = "/tmp/test_output"
+    names = None
+    legends = False
+    force = False
+    file_type = "stl"
+
     def __init__(self, **kwargs):
-        self.out = kwargs.get("out", "/tmp/test_output")
-        self.names = kwargs.get("names")
-        self.legends = kwargs.get("legends", False)
-        self.force = kwargs.get("force", False)
-        self.file_type = kwargs.get("file_type", "stl")
+        self.__dict__.update(kwargs)
 
 
-class TestMakeCommandsFunction(unittest.TestCase):
+class TestMakeCommandsFunction(CommandAssertions, unittest.TestCase):
     """Test the make_commands function from keyplay module"""
 
-    def setUp(self):
-        """Set up test fixtures"""
-        self.output_path = Path("/tmp/test_output")
+    output_path = Path("/tmp/test_output")
+    # make_commands() results for the real catalog; see _cached_make_commands()
+    _make_commands_cache: ClassVar[dict] = {}
+
+    @classmethod
+    def setUpClass(cls):
+        """Check the catalog and look up the (read-only) keycap with legends once"""
+        assert KEYCAPS, "KEYCAPS must be non-empty for these tests"
+        cls._make_commands_cache.clear()
+        # A keycap with actual legends
+        cls.legend_keycap = next((k for k in KEYCAPS if k.legends and k.legends != [""]), None)
+
+    def _cached_make_commands(self, args):
+        """
+        Returns make_commands(args), only walking the real catalog once for the same arguments.
+        The returned commands are shared between tests so they must not be modified.  Tests
+        that patch the catalog or pass in the existing files call make_commands() directly.
+        """
+        key = (args.out, tuple(args.names or ()), args.legends, args.force, args.file_type)
+        if key not in self._make_commands_cache:
+            self._make_commands_cache[key] = make_commands(args)
+        return self._make_commands_cache[key]
 
     def test_make_commands_basic_single_keycap(self):
         """Test make_commands with a single keycap using default parameters"""
@@ -33,12 +62,12 @@ class TestMakeCommandsFunction(unittest.TestCase):
             name="test_keycap", output_path=str(self.output_path), legends=["A"]
         )
 
-        # Temporarily add it to KEYCAPS for this test
-        original_keycaps = list(KEYCAPS)  # Make a copy
-        KEYCAPS.clear()
-        KEYCAPS.append(test_keycap)
-
-        try:
+        # Temporarily make it the only keycap for this test.  Rebinding the module attributes
+        # means nothing has to be copied (or rebuilt) to restore the real catalog afterwards.
+        with (
+            patch.object(riskeycap, "KEYCAPS", (test_keycap,)),
+            patch.object(riskeycap, "KEYCAPS_BY_NAME", {"test_keycap": test_keycap}),
+        ):
             # Create args with default parameters
             args = MockArgs(names=["test_keycap"], force=True)
 
@@ -46,236 +75,232 @@ class TestMakeCommandsFunction(unittest.TestCase):
             commands = make_commands(args)
 
             # Check that we got commands
-            self.assertGreater(len(commands), 0, "Should generate at least one command")
+            self.assertTrue(commands, "Should generate at least one command")
 
             # Check that the command contains expected elements
-            command_str = str(commands[0])
-            self.assertIn("test_keycap", command_str)
-            self.assertIn(".stl", command_str)
-            self.assertIn('RENDER=["keycap", "stem"]', command_str)
-            self.assertIn('LEGENDS=["A"]', command_str)
-        finally:
-            # Restore original KEYCAPS
-            KEYCAPS.clear()
-            KEYCAPS.extend(original_keycaps)
+            self.assertIsInstance(commands[0], list)
+            command_str = " ".join(commands[0])
+            self.assertAllIn(
+                [
+                    "test_keycap",
+                    ".stl",
+                    'RENDER=["keycap", "stem"]',
+                    'LEGENDS=["A"]',
+                ],
+                command_str,
+            )
 
     def test_make_commands_all_keycaps(self):
         """Test make_commands processes all keycaps when no specific names are provided"""
         args = MockArgs(names=None, force=True)
 
         # Call make_commands
-        commands = make_commands(args)
+        commands = self._cached_make_commands(args)
 
         # Check that we got commands for all keycaps
-        self.assertGreater(len(commands), 0, "Should generate commands for all keycaps")
+        self.assertTrue(commands, "Should generate commands for all keycaps")
 
-        # Check that each command is a string
+        # Check that each command is a list of arguments
         for command in commands:
-            self.assertIsInstance(command, str, "Each command should be a string")
-            self.assertIn(".stl", command, "Default file type should be .stl")
+            self.assertIsInstance(command, list, "Each command should be a list of arguments")
+            self.assertIn(".stl", " ".join(command), "Default file type should be .stl")
 
     def test_make_commands_specific_keycap_names(self):
         """Test make_commands processes only specific keycap names when provided"""
         # Find a keycap that exists in the KEYCAPS list
-        if len(KEYCAPS) > 0:
-            test_keycap_name = KEYCAPS[0].name
+        test_keycap_name = FIRST_KEYCAP_NAME
 
-            args = MockArgs(names=[test_keycap_name], force=True)
+        args = MockArgs(names=[test_keycap_name], force=True)
 
-            # Call make_commands
-            commands = make_commands(args)
+        # Call make_commands
+        commands = self._cached_make_commands(args)
 
-            # Check that we got commands
-            self.assertGreater(
-                len(commands),
-                0,
-                f"Should generate commands for keycap '{test_keycap_name}'",
-            )
+        # Check that we got commands
+        self.assertTrue(
+            commands,
+            f"Should generate commands for keycap '{test_keycap_name}'",
+        )
+
+        # Check that the command contains the keycap name
+        self.assertIsInstance(commands[0], list)
+        command_str = " ".join(commands[0])
+        self.assertIn(test_keycap_name, command_str)
+
+    def test_make_commands_names_are_case_insensitive(self):
+        """Test make_commands matches keycap names regardless of case"""
+        args = MockArgs(names=["1u_BLANK"], force=True)
 
-            # Check that the command contains the keycap name
-            command_str = str(commands[0])
-            self.assertIn(test_keycap_name, command_str)
+        commands = self._cached_make_commands(args)
+
+        self.assertEqual(len(commands), 1)
+        self.assertIn("1U_blank.stl", " ".join(commands[0]))
 
     def test_make_commands_with_legends_flag(self):
         """Test make_commands handles the legends flag correctly"""
-        # Find a keycap with actual legends
-        test_keycap = None
-        for keycap in KEYCAPS:
-            if keycap.legends and keycap.legends != [""]:
-                test_keycap = keycap
-                break
-
-        if test_keycap:
-            # Temporarily modify it for this test
-            original_name = test_keycap.name
-            original_legends = test_keycap.legends[:]
-
-            try:
-                args = MockArgs(names=[test_keycap.name], legends=True, force=True)
-
-                # Call make_commands
-                commands = make_commands(args)
+        test_keycap = self.legend_keycap
+        if test_keycap is None:
+            self.skipTest("no legend-bearing keycap")
 
-                # Should have commands for both the keycap and its legends
-                self.assertGreater(
-                    len(commands),
-                    1,
-                    "Should generate commands for both keycap and legends when legends=True",
-                )
-
-                # Check that one command is for the keycap and one is for the legends
-                keycap_command = None
-                legends_command = None
-                for command in commands:
-                    if isinstance(command, str) and "_legends" in command:
-                        legends_command = command
-                    elif isinstance(command, str):
-                        keycap_command = command
-
-                self.assertIsNotNone(
-                    keycap_command, "Should have a command for the keycap"
-                )
-                self.assertIsNotNone(
-                    legends_command, "Should have a command for the legends"
-                )
-            finally:
-                # Restore original values
-                test_keycap.name = original_name
-                test_keycap.legends = original_legends
+        args = MockArgs(names=[test_keycap.name], legends=True, force=True)
+
+        # Call make_commands
+        commands = self._cached_make_commands(args)
+
+        # Should have commands for both the keycap and its legends
+        self.assertGreater(
+            len(commands),
+            1,
+            "Should generate commands for both keycap and legends when legends=True",
+        )
+
+        # Check that one command is for the keycap and one is for the legends
+        legends_command = next((c for c in commands if "_legends" in " ".join(c)), None)
+        keycap_command = next((c for c in commands if "_legends" not in " ".join(c)), None)
+
+        self.assertIsNotNone(
+            keycap_command, "Should have a command for the keycap"
+        )
+        self.assertIsNotNone(
+            legends_command, "Should have a command for the legends"
+        )
+
+    def test_make_commands_logs_the_legends_command(self):
+        """Test that the debug log shows the legends command (not the keycap's own one)"""
+        test_keycap = self.legend_keycap
+        if test_keycap is None:
+            self.skipTest("no legend-bearing keycap")
+
+        args = MockArgs(names=[test_keycap.name], legends=True, force=True)
+        with self.assertLogs("src.keyplay", level="DEBUG") as logs:
+            make_commands(args)
+
+        legend_details = next(line for line in logs.output if "Legend details" in line)
+        self.assertIn(f"{test_keycap.name}_legends.stl", legend_details)
+        self.assertIn('RENDER=["legends"]', legend_details)
+
+    def test_make_commands_logs_the_output_file_it_renders(self):
+        """Test that the logged output file is the one passed to -o (even for a trailing /)"""
+        args = MockArgs(out="/tmp/test_output/", names=[FIRST_KEYCAP_NAME], force=True)
+        with self.assertLogs("src.keyplay", level="INFO") as logs:
+            commands = make_commands(args)
+
+        output_file = commands[0][commands[0].index("-o") + 1]
+        self.assertIn(f"INFO:src.keyplay:Rendering {output_file}...", logs.output)
 
     def test_make_commands_with_force_flag(self):
         """Test make_commands behavior when force flag is True"""
-        if len(KEYCAPS) > 0:
-            test_keycap_name = KEYCAPS[0].name
+        test_keycap_name = FIRST_KEYCAP_NAME
 
-            args = MockArgs(names=[test_keycap_name], force=True)
+        args = MockArgs(names=[test_keycap_name], force=True)
 
-            # Call make_commands
-            commands = make_commands(args)
+        # Call make_commands
+        commands = self._cached_make_commands(args)
 
-            # With force=True, it should process the keycap regardless of file existence
-            self.assertGreater(
-                len(commands), 0, "Should process keycap when force=True"
-            )
+        # With force=True, it should process the keycap regardless of file existence
+        self.assertTrue(commands, "Should process keycap when force=True")
 
-    @patch("os.path.exists")
-    def test_make_commands_skips_existing_files_when_force_false(self, mock_exists):
+    def test_make_commands_skips_existing_files_when_force_false(self):
         """Test that make_commands skips existing files when force flag is False"""
-        mock_exists.return_value = True  # Simulate that output files exist
+        test_keycap_name = FIRST_KEYCAP_NAME
+        # Simulate that the output file exists
+        existing = {f"{test_keycap_name}.stl"}
+
+        args = MockArgs(names=[test_keycap_name], force=False)
 
-        if len(KEYCAPS) > 0:
-            test_keycap_name = KEYCAPS[0].name
+        # Call make_commands
+        commands = make_commands(args, existing=existing)
 
-            args = MockArgs(names=[test_keycap_name], force=False)
+        # When force=False and files exist, no commands should be generated
+        self.assertFalse(
+            commands,
+            "Should not generate commands when files exist and force=False",
+        )
 
-            # Call make_commands
-            commands = make_commands(args)
+    def test_make_commands_lists_output_directory_once(self):
+        """Test that existing files are looked up with a single directory listing"""
+        with tempfile.TemporaryDirectory() as out:
+            Path(out, "1U_blank.stl").touch()
+            args = MockArgs(out=out, names=None, force=False)
 
-            # When force=False and files exist, no commands should be generated
-            self.assertEqual(
-                len(commands),
-                0,
-                "Should not generate commands when files exist and force=False",
-            )
+            with patch("os.scandir", wraps=os.scandir) as mock_scandir:
+                commands = make_commands(args)
+
+        mock_scandir.assert_called_once_with(out)
+        output_files = [command[command.index("-o") + 1] for command in commands]
+        self.assertNotIn(f"{out}/1U_blank.stl", output_files)
+        self.assertIn(f"{out}/tilde.stl", output_files)
 
     def test_make_commands_with_empty_names_list(self):
         """Test make_commands behavior when names list is empty"""
         args = MockArgs(names=[], force=True)
 
         # Call make_commands
-        commands = make_commands(args)
+        commands = self._cached_make_commands(args)
 
         # With empty names list, it should process all keycaps
-        self.assertGreater(
-            len(commands), 0, "Should process all keycaps when names list is empty"
-        )
+        self.assertTrue(commands, "Should process all keycaps when names list is empty")
 
     def test_make_commands_with_nonexistent_keycap_name(self):
         """Test make_commands behavior when a specific keycap name is not found"""
         args = MockArgs(names=["nonexistent_keycap"], force=True)
 
         # Call make_commands
-        commands = make_commands(args)
+        commands = self._cached_make_commands(args)
 
         # When keycap name is not found, no commands should be generated
-        self.assertEqual(
-            len(commands),
-            0,
-            "Should not generate commands when keycap name is not found",
+        self.assertFalse(commands, "Should not generate commands when keycap name is not found")
+
+    def _assert_stl(self, commands, name):
+        """Asserts that the first of `commands` renders keycap `name` to an STL file"""
+        self.assertTrue(commands, f"Should generate commands for keycap '{name}'")
+
+        # Check that the command contains the STL file type
+        self.assertIsInstance(commands[0], list)
+        command_str = " ".join(commands[0])
+        self.assertIn(name, command_str)
+        self.assertTrue(
+            ".stl" in command_str and ".3mf" not in command_str,
+            msg=f"Expected an STL (and no 3MF) output in {command_str!r}",
         )
 
     def test_make_commands_with_file_type_stl(self):
-        """Test make_commands generates commands with STL file type when specified"""
+        """Test make_commands generates STL commands when specified (and by default)"""
         # Find a keycap that exists in the KEYCAPS list
-        if len(KEYCAPS) > 0:
-            test_keycap_name = KEYCAPS[0].name
+        test_keycap_name = FIRST_KEYCAP_NAME
 
+        with self.subTest(explicit=True):
             args = MockArgs(names=[test_keycap_name], file_type="stl", force=True)
+            self._assert_stl(self._cached_make_commands(args), test_keycap_name)
 
-            # Call make_commands
-            commands = make_commands(args)
-
-            # Check that we got commands
-            self.assertGreater(
-                len(commands),
-                0,
-                f"Should generate commands for keycap '{test_keycap_name}'",
-            )
-
-            # Check that the command contains the STL file type
-            command_str = str(commands[0])
-            self.assertIn(test_keycap_name, command_str)
-            self.assertIn(".stl", command_str)
-            self.assertNotIn(".3mf", command_str)
+        with self.subTest(explicit=False):
+            # Create args without specifying file_type (should default to stl)
+            args = MockArgs(names=[test_keycap_name], force=True)
+            self._assert_stl(self._cached_make_commands(args), test_keycap_name)
 
     def test_make_commands_with_file_type_3mf(self):
         """Test make_commands generates commands with 3MF file type when specified"""
         # Find a keycap that exists in the KEYCAPS list
-        if len(KEYCAPS) > 0:
-            test_keycap_name = KEYCAPS[0].name
+        test_keycap_name = FIRST_KEYCAP_NAME
 
-            args = MockArgs(names=[test_keycap_name], file_type="3mf", force=True)
+        args = MockArgs(names=[test_keycap_name], file_type="3mf", force=True)
 
-            # Call make_commands
-            commands = make_commands(args)
-
-            # Check that we got commands
-            self.assertGreater(
-                len(commands),
-                0,
-                f"Should generate commands for keycap '{test_keycap_name}'",
-            )
-
-            # Check that the command contains the 3MF file type
-            command_str = str(commands[0])
-            self.assertIn(test_keycap_name, command_str)
-            self.assertIn(".3mf", command_str)
-            self.assertNotIn(".stl", command_str)
-
-    def test_make_commands_default_file_type_is_stl(self):
-        """Test make_commands uses STL as the default file type"""
-        # Find a keycap that exists in the KEYCAPS list
-        if len(KEYCAPS) > 0:
-            test_keycap_name = KEYCAPS[0].name
-
-            # Create args without specifying file_type (should default to stl)
-            args = MockArgs(names=[test_keycap_name], force=True)
-
-            # Call make_commands
-            commands = make_commands(args)
+        # Call make_commands
+        commands = self._cached_make_commands(args)
 
-            # Check that we got commands
-            self.assertGreater(
-                len(commands),
-                0,
-                f"Should generate commands for keycap '{test_keycap_name}'",
-            )
+        # Check that we got commands
+        self.assertTrue(
+            commands,
+            f"Should generate commands for keycap '{test_keycap_name}'",
+        )
 
-            # Check that the command contains the STL file type by default
-            command_str = str(commands[0])
-            self.assertIn(test_keycap_name, command_str)
-            self.assertIn(".stl", command_str)
-            self.assertNotIn(".3mf", command_str)
+        # Check that the command contains the 3MF file type
+        self.assertIsInstance(commands[0], list)
+        command_str = " ".join(commands[0])
+        self.assertIn(test_keycap_name, command_str)
+        self.assertTrue(
+            ".3mf" in command_str and ".stl" not in command_str,
+            msg=f"Expected a 3MF (and no STL) output in {command_str!r}",
+        )
 
 
 if __name__ == "__main__":
@@ -6,24 +6,30 @@ Tests the riskeycap classes and their functionality.
 """
 import unittest
 
+from src import riskeycap
+from src.keycap import Keycap
 from src.riskeycap import (
     RiskeycapBase,
     KEYCAPS,
+    KEYCAPS_BY_NAME,
     KEY_UNIT,
     BETWEENSPACE,
-    riskeycap_alphas,
-    riskeycap_1_25U,
-    riskeycap_1_5U,
-    riskeycap_1_75U,
-    riskeycap_2U,
-    riskeycap_2UV,
-    riskeycap_2_25U,
-    riskeycap_2_5U,
-    riskeycap_2_75U,
-    riskeycap_6_25U,
-    riskeycap_7U,
 )
 
+# (naming prefix, keycap class adding it) for the unit size naming tests below
+NAMING_CASES = [
+    ("1.25U_", riskeycap.riskeycap_1_25U),
+    ("1.5U_", riskeycap.riskeycap_1_5U),
+    ("1.75U_", riskeycap.riskeycap_1_75U),
+    ("2U_", riskeycap.riskeycap_2U),
+    ("2UV_", riskeycap.riskeycap_2UV),
+    ("2.25U_", riskeycap.riskeycap_2_25U),
+    ("2.5U_", riskeycap.riskeycap_2_5U),
+    ("2.75U_", riskeycap.riskeycap_2_75U),
+    ("6.25U_", riskeycap.riskeycap_6_25U),
+    ("7U_", riskeycap.riskeycap_7U),
+]
+
 
 class TestRiskeycapBase(unittest.TestCase):
     """Test the RiskeycapBase class."""
@@ -60,89 +66,34 @@ class TestRiskeycapBase(unittest.TestCase):
 class TestRiskeycapSpecializations(unittest.TestCase):
     """Test various riskeycap specializations."""
 
+    @classmethod
+    def setUpClass(cls):
+        """Build the keycaps checked by the naming tests once"""
+        cls._naming_instances = {
+            keycap_class: keycap_class(name="test_keycap") for _, keycap_class in NAMING_CASES
+        }
+
     def test_alphas_initialization(self):
         """Test riskeycap_alphas initialization."""
-        keycap = riskeycap_alphas(name="A")
+        keycap = riskeycap.riskeycap_alphas(name="A")
 
         # Should inherit from RiskeycapBase but override font sizes and positions
         self.assertEqual(keycap.name, "A")
         self.assertEqual(keycap.key_profile, "riskeycap")
         self.assertEqual(keycap.font_sizes[0], 4.5)  # Regular Gotham Rounded
 
-    def test_1_25u_naming(self):
-        """Test that 1.25U keycap has correct naming prefix."""
-        keycap = riskeycap_1_25U(name="test_keycap")
+    def test_unit_naming_prefixes(self):
+        """Test that the wider keycaps get their unit size as a naming prefix."""
+        for prefix, keycap_class in NAMING_CASES:
+            with self.subTest(prefix=prefix):
+                self.assertTrue(self._naming_instances[keycap_class].name.startswith(prefix))
 
-        # Should have 1.25U_ prefix added
-        self.assertTrue(keycap.name.startswith("1.25U_"))
+        keycap = self._naming_instances[riskeycap.riskeycap_1_25U]
         self.assertEqual(keycap.key_length, KEY_UNIT * 1.25 - 0.8)
 
-    def test_1_5u_naming(self):
-        """Test that 1.5U keycap has correct naming prefix."""
-        keycap = riskeycap_1_5U(name="test_keycap")
-
-        # Should have 1.5U_ prefix added
-        self.assertTrue(keycap.name.startswith("1.5U_"))
-
-    def test_1_75u_naming(self):
-        """Test that 1.75U keycap has correct naming prefix."""
-        keycap = riskeycap_1_75U(name="test_keycap")
-
-        # Should have 1.75U_ prefix added
-        self.assertTrue(keycap.name.startswith("1.75U_"))
-
-    def test_2u_naming(self):
-        """Test that 2U keycap has correct naming prefix."""
-        keycap = riskeycap_2U(name="test_keycap")
-
-        # Should have 2U_ prefix added
-        self.assertTrue(keycap.name.startswith("2U_"))
-
-    def test_2uv_naming(self):
-        """Test that 2UV keycap has correct naming prefix."""
-        keycap = riskeycap_2UV(name="test_keycap")
-
-        # Should have 2UV_ prefix added
-        self.assertTrue(keycap.name.startswith("2UV_"))
-
-    def test_2_25u_naming(self):
-        """Test that 2.25U keycap has correct naming prefix."""
-        keycap = riskeycap_2_25U(name="test_keycap")
-
-        # Should have 2.25U_ prefix added
-        self.assertTrue(keycap.name.startswith("2.25U_"))
-
-    def test_2_5u_naming(self):
-        """Test that 2.5U keycap has correct naming prefix."""
-        keycap = riskeycap_2_5U(name="test_keycap")
-
-        # Should have 2.5U_ prefix added
-        self.assertTrue(keycap.name.startswith("2.5U_"))
-
-    def test_2_75u_naming(self):
-        """Test that 2.75U keycap has correct naming prefix."""
-        keycap = riskeycap_2_75U(name="test_keycap")
-
-        # Should have 2.75U_ prefix added
-        self.assertTrue(keycap.name.startswith("2.75U_"))
-
-    def test_6_25u_naming(self):
-        """Test that 6.25U keycap has correct naming prefix."""
-        keycap = riskeycap_6_25U(name="test_keycap")
-
-        # Should have 6.25U_ prefix added
-        self.assertTrue(keycap.name.startswith("6.25U_"))
-
-    def test_7u_naming(self):
-        """Test that 7U keycap has correct naming prefix."""
-        keycap = riskeycap_7U(name="test_keycap")
-
-        # Should have 7U_ prefix added
-        self.assertTrue(keycap.name.startswith("7U_"))
-
     def test_naming_with_existing_prefix(self):
         """Test that naming doesn't double-add prefixes."""
-        keycap = riskeycap_1_25U(name="1.25U_existing")
+        keycap = riskeycap.riskeycap_1_25U(name="1.25U_existing")
 
         # Should not double the prefix
         self.assertEqual(keycap.name, "1.25U_existing")
@@ -151,9 +102,25 @@ class TestRiskeycapSpecializations(unittest.TestCase):
 class TestKeycapsConstant(unittest.TestCase):
     """Test the KEYCAPS constant."""
 
-    def test_keycaps_is_list(self):
-        """Test that KEYCAPS is a list."""
-        self.assertIsInstance(KEYCAPS, list)
+    @classmethod
+    def setUpClass(cls):
+        """Walk KEYCAPS once for the checks that apply to every keycap"""
+        cls._names = [keycap.name for keycap in KEYCAPS]
+        cls._has_name = all(
+            keycap is not None and hasattr(keycap, "name") for keycap in KEYCAPS
+        )
+        cls._all_keycap_instances = all(isinstance(keycap, Keycap) for keycap in KEYCAPS)
+
+    def test_keycaps_is_tuple(self):
+        """Test that KEYCAPS is a (frozen) tuple."""
+        self.assertIsInstance(KEYCAPS, tuple)
+
+    def test_keycaps_by_name(self):
+        """Test that KEYCAPS_BY_NAME maps every lowercase name to its first keycap."""
+        for keycap in KEYCAPS:
+            if keycap.name:
+                self.assertIn(keycap.name.lower(), KEYCAPS_BY_NAME)
+        self.assertIs(KEYCAPS_BY_NAME["z"], next(k for k in KEYCAPS if k.name == "Z"))
 
     def test_keycaps_not_empty(self):
         """Test that KEYCAPS contains keycaps."""
@@ -161,23 +128,18 @@ class TestKeycapsConstant(unittest.TestCase):
 
     def test_all_keycaps_have_names(self):
         """Test that all keycaps in KEYCAPS have names."""
-        for keycap in KEYCAPS:
-            # Should have a name attribute (could be None or empty string)
-            self.assertIsNotNone(keycap)
-            self.assertTrue(hasattr(keycap, "name"))
+        # Should have a name attribute (could be None or empty string)
+        self.assertTrue(self._has_name, "Every keycap should have a name attribute")
 
     def test_keycap_names_are_strings_or_none(self):
         """Test that keycap names are either strings or None."""
-        for keycap in KEYCAPS:
-            if keycap.name is not None:
-                self.assertIsInstance(keycap.name, str)
+        for name in self._names:
+            if name is not None:
+                self.assertIsInstance(name, str)
 
     def test_all_keycaps_inherit_from_keycap(self):
         """Test that all keycaps inherit from the Keycap base class."""
-        from src.keycap import Keycap
-
-        for keycap in KEYCAPS:
-            self.assertIsInstance(keycap, Keycap)
+        self.assertTrue(self._all_keycap_instances, "Every keycap should be a Keycap")
 
 
 class TestKeycapProperties(unittest.TestCase):
@@ -194,18 +156,18 @@ class TestKeycapProperties(unittest.TestCase):
     def test_different_unit_sizes(self):
         """Test that different unit sizes have appropriate dimensions."""
         # Test 1.25U
-        keycap_1_25 = riskeycap_1_25U(name="test")
+        keycap_1_25 = riskeycap.riskeycap_1_25U(name="test")
         expected_1_25 = KEY_UNIT * 1.25 - BETWEENSPACE
         self.assertAlmostEqual(keycap_1_25.key_length, expected_1_25, places=2)
 
         # Test 1.75U
-        keycap_1_75 = riskeycap_1_75U(name="test")
+        keycap_1_75 = riskeycap.riskeycap_1_75U(name="test")
         expected_1_75 = KEY_UNIT * 1.75 - BETWEENSPACE
         self.assertAlmostEqual(keycap_1_75.key_length, expected_1_75, places=2)
 
     def test_font_configurations(self):
         """Test that font configurations are properly set."""
-        keycap = riskeycap_alphas(name="A")
+        keycap = riskeycap.riskeycap_alphas(name="A")
 
         # Should have font configuration
         self.assertIsInstance(keycap.fonts, list)
@@ -223,31 +185,33 @@ class TestKeycapProperties(unittest.TestCase):
 class TestEdgeCases(unittest.TestCase):
     """Test edge cases and error conditions."""
 
+    @classmethod
+    def setUpClass(cls):
+        """Build the keycaps shared (read-only) by the tests below once"""
+        cls.none_keycap = RiskeycapBase(name=None)
+        cls.empty_keycap = RiskeycapBase(name="")
+
     def test_keycap_with_none_name(self):
         """Test that keycaps can handle None names gracefully."""
-        keycap = RiskeycapBase(name=None)
+        keycap = self.none_keycap
 
         # Should not crash when name is None
         self.assertIsNone(keycap.name)
 
     def test_keycap_with_empty_name(self):
         """Test that keycaps can handle empty names gracefully."""
-        keycap = RiskeycapBase(name="")
+        keycap = self.empty_keycap
 
         # Should handle empty name
         self.assertEqual(keycap.name, "")
 
     def test_keycap_naming_safety_with_none(self):
         """Test that None name doesn't cause crashes in naming methods."""
-        keycap = RiskeycapBase(name=None)
+        keycap = self.none_keycap
 
         # Should not crash when calling startswith on None
         # This tests the fix for the type checking issues
-        if keycap.name is not None:
-            result = keycap.name.startswith("test_")
-        else:
-            result = False
-        self.assertIsInstance(result, bool)
+        self.assertIsInstance((keycap.name or "").startswith("test_"), bool)
 
 
 if __name__ == "__main__":